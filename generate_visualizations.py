@@ -11,130 +11,144 @@ Affiliation: University Of Florida
 """
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Render straight to files; no GUI windows to open or block on
 import matplotlib.pyplot as plt
 from main_solar_analysis import SolarAnalysis # Import the class from the other file
 
-def get_monthly_ghi_data(analyzer: SolarAnalysis, sky_condition: str) -> pd.DataFrame:
+def get_arrangement_tilts(analyzer: SolarAnalysis, sky_condition: str) -> dict:
     """
-    Calculates the GHI for every month for each of the 6 arrangements.
+    Determines the tilt used in every month by each of the 6 arrangements.
 
     Args:
         analyzer: An instantiated SolarAnalysis object.
         sky_condition: 'cloudy' or 'clear'.
 
     Returns:
-        A DataFrame with months as rows and arrangements as columns.
+        A dict mapping each arrangement name to a list of 12 monthly tilts.
     """
-    
-    # --- Tilts for each arrangement ---
+    months = list(range(1, 13))
+    tilts = {}
+    tilts['Arr 1: 0° Fixed'] = [0] * 12
+    tilts['Arr 2: 29° Fixed'] = [analyzer.LATITUDE_DEGREES] * 12
+
+    # Arr 3: Fixed tilts at latitude -/+ half of Earth's axial tilt
+    adjustment = analyzer.EARTH_AXIAL_TILT / 2
+    tilts['Arr 3: Two-Season Fixed'] = [(analyzer.LATITUDE_DEGREES - adjustment) if m in analyzer.SUMMER_MONTHS else (analyzer.LATITUDE_DEGREES + adjustment) for m in months]
+
     # Arr 4: Find optimal tilt for each month
-    monthly_tilts_arr4 = [analyzer.find_optimal_tilt([m], sky_condition)[0] for m in range(1, 13)]
-    
+    tilts['Arr 4: Monthly Optimal'] = [analyzer.find_optimal_tilt([m], sky_condition)[0] for m in months]
+
     # Arr 5: Find one optimal tilt for summer and one for winter
     opt_tilt_summer, _ = analyzer.find_optimal_tilt(analyzer.SUMMER_MONTHS, sky_condition)
     opt_tilt_winter, _ = analyzer.find_optimal_tilt(analyzer.WINTER_MONTHS, sky_condition)
-    monthly_tilts_arr5 = [opt_tilt_summer if m in analyzer.SUMMER_MONTHS else opt_tilt_winter for m in range(1, 13)]
+    tilts['Arr 5: Two-Season Optimal'] = [opt_tilt_summer if m in analyzer.SUMMER_MONTHS else opt_tilt_winter for m in months]
 
     # Arr 6: Find one optimal tilt for the whole year
-    opt_tilt_annual, _ = analyzer.find_optimal_tilt(list(range(1, 13)), sky_condition)
+    opt_tilt_annual, _ = analyzer.find_optimal_tilt(months, sky_condition)
+    tilts['Arr 6: Annual Optimal'] = [opt_tilt_annual] * 12
 
-    # --- Collect monthly GHI data ---
-    data = {}
-    month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    return tilts
 
-    for i, month_name in enumerate(month_names):
-        month_num = i + 1
-        
-        # Calculate GHI for this month using the tilt defined by each arrangement
-        adjustment = analyzer.EARTH_AXIAL_TILT / 2
-        
-        data.setdefault("Month", []).append(month_name)
-        data.setdefault("Arr 1: 0° Fixed", []).append(analyzer.calculate_ghi_for_tilt(0, [month_num], sky_condition))
-        data.setdefault("Arr 2: 29° Fixed", []).append(analyzer.calculate_ghi_for_tilt(analyzer.LATITUDE_DEGREES, [month_num], sky_condition))
-        
-        # Arr 3 uses different tilts for summer/winter
-        tilt_arr3 = (analyzer.LATITUDE_DEGREES - adjustment) if month_num in analyzer.SUMMER_MONTHS else (analyzer.LATITUDE_DEGREES + adjustment)
-        data.setdefault("Arr 3: Two-Season Fixed", []).append(analyzer.calculate_ghi_for_tilt(tilt_arr3, [month_num], sky_condition))
+def get_monthly_ghi_data(analyzer: SolarAnalysis, sky_condition: str) -> tuple:
+    """
+    Calculates the GHI for every month for each of the 6 arrangements.
 
-        data.setdefault("Arr 4: Monthly Optimal", []).append(analyzer.calculate_ghi_for_tilt(monthly_tilts_arr4[i], [month_num], sky_condition))
-        data.setdefault("Arr 5: Two-Season Optimal", []).append(analyzer.calculate_ghi_for_tilt(monthly_tilts_arr5[i], [month_num], sky_condition))
-        data.setdefault("Arr 6: Annual Optimal", []).append(analyzer.calculate_ghi_for_tilt(opt_tilt_annual, [month_num], sky_condition))
+    Args:
+        analyzer: An instantiated SolarAnalysis object.
+        sky_condition: 'cloudy' or 'clear'.
 
-    return pd.DataFrame(data).set_index("Month")
+    Returns:
+        A tuple of (DataFrame with months as rows and arrangements as columns,
+        dict of monthly tilts per arrangement as from get_arrangement_tilts).
+    """
+    tilts = get_arrangement_tilts(analyzer, sky_condition)
+
+    # --- Collect monthly GHI data, one whole-year pass per arrangement ---
+    month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    monthly_ghi = {
+        name: analyzer.calculate_monthly_ghi(tilt_values, sky_condition)
+        for name, tilt_values in tilts.items()
+    }
+    return pd.DataFrame(monthly_ghi, index=month_names).rename_axis("Month"), tilts
+
+def save_figure(fig, name: str, sky_condition: str, year: int):
+    """Saves a figure as '<name>_<year>_<sky_condition>.png' and closes it."""
+    file_name = f'{name}_{year}_{sky_condition}.png'
+    fig.savefig(file_name, dpi=100)
+    plt.close(fig)
+    print(f"Saved {file_name}")
 
 def plot_monthly_comparison(monthly_df: pd.DataFrame, arr1_name: str, arr2_name: str, sky_condition: str, year: int):
     """Generates a grouped bar chart comparing the monthly GHI of two arrangements."""
     
-    df_to_plot = monthly_df[[arr1_name, arr2_name]]
-    
-    df_to_plot.plot(kind='bar', figsize=(12, 7), width=0.8)
-    
-    plt.title(f'Monthly GHI Comparison: {arr1_name} vs. {arr2_name} ({year}, {sky_condition.capitalize()} Sky)', fontsize=16)
-    plt.ylabel('GHI Output (Wh/m²)', fontsize=12)
-    plt.xlabel('Month', fontsize=12)
-    plt.xticks(rotation=0)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.legend(title='Arrangement')
-    plt.tight_layout()
-    plt.show()
-
-def plot_tilt_strategies(analyzer: SolarAnalysis, sky_condition: str, year: int):
-    """Plots the tilt angles used by each arrangement over the year."""
+    fig, ax = plt.subplots(figsize=(12, 7))
+    x = np.arange(len(monthly_df))
+    bar_width = 0.4
+    ax.bar(x - bar_width / 2, monthly_df[arr1_name].values, width=bar_width, label=arr1_name)
+    ax.bar(x + bar_width / 2, monthly_df[arr2_name].values, width=bar_width, label=arr2_name)
+    
+    ax.set_title(f'Monthly GHI Comparison: {arr1_name} vs. {arr2_name} ({year}, {sky_condition.capitalize()} Sky)', fontsize=16)
+    ax.set_ylabel('GHI Output (Wh/m²)', fontsize=12)
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_xticks(x, monthly_df.index)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.legend(title='Arrangement')
+    fig.tight_layout()
+
+    # e.g. "Arr 1: 0° Fixed" -> "arr1"
+    arr1_key, arr2_key = (name.split(':')[0].replace(' ', '').lower() for name in (arr1_name, arr2_name))
+    save_figure(fig, f'monthly_comparison_{arr1_key}_vs_{arr2_key}', sky_condition, year)
+
+def plot_tilt_strategies(analyzer: SolarAnalysis, sky_condition: str, year: int, tilts: dict = None):
+    """
+    Plots the tilt angles used by each arrangement over the year.
+
+    Pass the tilts returned by get_monthly_ghi_data to avoid repeating the
+    optimal tilt searches; they are computed here if not given.
+    """
     
-    plt.figure(figsize=(14, 8))
+    fig, ax = plt.subplots(figsize=(14, 8))
     months = list(range(1, 13))
     month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
     
     # --- Get tilts for each strategy ---
-    tilts = {}
-    tilts['Arr 1: 0° Fixed'] = [0] * 12
-    tilts['Arr 2: 29° Fixed'] = [analyzer.LATITUDE_DEGREES] * 12
-    
-    adjustment = analyzer.EARTH_AXIAL_TILT / 2
-    tilts['Arr 3: Two-Season Fixed'] = [(analyzer.LATITUDE_DEGREES - adjustment) if m in analyzer.SUMMER_MONTHS else (analyzer.LATITUDE_DEGREES + adjustment) for m in months]
-
-    tilts['Arr 4: Monthly Optimal'] = [analyzer.find_optimal_tilt([m], sky_condition)[0] for m in months]
-    
-    opt_tilt_summer, _ = analyzer.find_optimal_tilt(analyzer.SUMMER_MONTHS, sky_condition)
-    opt_tilt_winter, _ = analyzer.find_optimal_tilt(analyzer.WINTER_MONTHS, sky_condition)
-    tilts['Arr 5: Two-Season Optimal'] = [opt_tilt_summer if m in analyzer.SUMMER_MONTHS else opt_tilt_winter for m in months]
-    
-    opt_tilt_annual, _ = analyzer.find_optimal_tilt(months, sky_condition)
-    tilts['Arr 6: Annual Optimal'] = [opt_tilt_annual] * 12
+    if tilts is None:
+        tilts = get_arrangement_tilts(analyzer, sky_condition)
 
     # --- Plotting ---
     for name, tilt_values in tilts.items():
         # Use drawstyle='steps-post' for step-like functions
         drawstyle = 'steps-post' if name in ['Arr 3: Two-Season Fixed', 'Arr 5: Two-Season Optimal'] else 'default'
-        plt.plot(months, tilt_values, marker='o', linestyle='--', label=name, drawstyle=drawstyle)
-
-    plt.title(f'Comparison of Tilt Angle Strategies ({year}, {sky_condition.capitalize()} Sky)', fontsize=16)
-    plt.xlabel('Month', fontsize=12)
-    plt.ylabel('Panel Tilt Angle (Degrees)', fontsize=12)
-    plt.xticks(months, month_names)
-    plt.yticks(np.arange(0, 51, 5))
-    plt.legend(title='Arrangement', bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.grid(True, linestyle='--', alpha=0.7)
-    plt.tight_layout()
-    plt.show()
+        ax.plot(months, tilt_values, marker='o', linestyle='--', label=name, drawstyle=drawstyle)
+
+    ax.set_title(f'Comparison of Tilt Angle Strategies ({year}, {sky_condition.capitalize()} Sky)', fontsize=16)
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_ylabel('Panel Tilt Angle (Degrees)', fontsize=12)
+    ax.set_xticks(months, month_names)
+    ax.set_yticks(np.arange(0, 51, 5))
+    ax.legend(title='Arrangement', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(True, linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    save_figure(fig, 'tilt_strategies', sky_condition, year)
 
 def plot_cumulative_gain(monthly_df: pd.DataFrame, base_arr: str, optimized_arr: str, sky_condition: str, year: int):
     """Plots the cumulative GHI gain of an optimized strategy over a base strategy."""
     
     gain = (monthly_df[optimized_arr] - monthly_df[base_arr]).cumsum()
     
-    plt.figure(figsize=(12, 7))
-    gain.plot(kind='line', marker='o', legend=False)
+    fig, ax = plt.subplots(figsize=(12, 7))
+    gain.plot(kind='line', ax=ax, marker='o', legend=False)
     
-    plt.title(f'Cumulative GHI Gain: {optimized_arr} vs. {base_arr} ({year}, {sky_condition.capitalize()} Sky)', fontsize=16)
-    plt.ylabel('Cumulative GHI Gain (Wh/m²)', fontsize=12)
-    plt.xlabel('Month', fontsize=12)
-    plt.xticks(rotation=0)
-    plt.grid(True, linestyle='--', alpha=0.7)
+    ax.set_title(f'Cumulative GHI Gain: {optimized_arr} vs. {base_arr} ({year}, {sky_condition.capitalize()} Sky)', fontsize=16)
+    ax.set_ylabel('Cumulative GHI Gain (Wh/m²)', fontsize=12)
+    ax.set_xlabel('Month', fontsize=12)
+    ax.tick_params(axis='x', labelrotation=0)
+    ax.grid(True, linestyle='--', alpha=0.7)
     # Add a horizontal line at y=0 for reference
-    plt.axhline(0, color='black', linewidth=0.8, linestyle='--')
-    plt.tight_layout()
-    plt.show()
+    ax.axhline(0, color='black', linewidth=0.8, linestyle='--')
+    fig.tight_layout()
+    save_figure(fig, 'cumulative_gain', sky_condition, year)
 
 # --- Main Execution Block ---
 
@@ -149,7 +163,7 @@ if __name__ == "__main__":
     
     if main_analyzer.data is not None:
         # 1. Get the foundational monthly GHI data
-        monthly_ghi_df = get_monthly_ghi_data(main_analyzer, SKY_CONDITION)
+        monthly_ghi_df, arrangement_tilts = get_monthly_ghi_data(main_analyzer, SKY_CONDITION)
         
         # 2. Generate the requested comparison charts
         print("\nGenerating monthly comparison charts...")
@@ -159,7 +173,7 @@ if __name__ == "__main__":
         
         # 3. Generate the tilt strategy timeline
         print("Generating tilt strategy timeline chart...")
-        plot_tilt_strategies(main_analyzer, SKY_CONDITION, YEAR)
+        plot_tilt_strategies(main_analyzer, SKY_CONDITION, YEAR, tilts=arrangement_tilts)
         
         # 4. Generate the cumulative gain chart
         print("Generating cumulative gain chart...")
@@ -9,10 +9,30 @@ Author: Santhanam, Ganesan
 Date: May 2, 2025 - June 28, 2025
 Affiliation: University Of Florida
 """
+import functools
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+from solar_kernels import ghi_sum_over_tilts
+
+# cos/sin of every whole-number tilt searched (0-90 degrees), shared by all analyzers
+_TILT_COS = np.cos(np.radians(np.arange(91), dtype=np.float32))
+_TILT_SIN = np.sin(np.radians(np.arange(91), dtype=np.float32))
+
+def _tilt_trig(tilts_degrees) -> tuple:
+    """
+    Returns (cos, sin) of the given tilts, looked up from the shared tables
+    when every tilt is a whole number of degrees from 0 to 90.
+    """
+    tilts = np.atleast_1d(np.asarray(tilts_degrees))
+    if np.all((tilts >= 0) & (tilts <= 90) & (tilts == np.round(tilts))):
+        whole_tilts = tilts.astype(int)
+        return _TILT_COS[whole_tilts], _TILT_SIN[whole_tilts]
+    tilts_rad = np.radians(tilts.astype(np.float32))
+    return np.cos(tilts_rad), np.sin(tilts_rad)
+
 class SolarAnalysis:
     """
     A class to perform comprehensive solar panel tilt analysis based on GHI data.
@@ -20,6 +40,7 @@ class SolarAnalysis:
     # --- Constants for the analysis ---
     LATITUDE_DEGREES = 29.651949  # Gainesville, FL
     LATITUDE_RADIANS = np.radians(LATITUDE_DEGREES)
+    LATITUDE_RADIANS_F32 = np.float32(LATITUDE_RADIANS)
     EARTH_AXIAL_TILT = 23.45
 
     WINTER_MONTHS = [10, 11, 12, 1, 2, 3]
@@ -34,6 +55,14 @@ class SolarAnalysis:
         """
         self.csv_file_path = csv_file_path
         self.data = self._load_and_prepare_data()
+        self._by_sky = self._build_year_cache() if self.data is not None else {}
+        self._month_indices = self._build_month_indices() if self.data is not None else {}
+        self._fixed_tilt_monthly_ghi = self._build_fixed_tilt_cache() if self.data is not None else {}
+        # Per-instance memoization; the visualizations repeat many identical calls
+        self._cached_period_arrays = functools.lru_cache(maxsize=None)(self._gather_period_arrays)
+        self._cached_ghi_for_tilt = functools.lru_cache(maxsize=None)(self._calculate_ghi_for_tilt)
+        self._cached_optimal_tilt = functools.lru_cache(maxsize=None)(self._find_optimal_tilt)
+        self._cached_ghi_by_tilt_and_month = functools.lru_cache(maxsize=None)(self._calculate_ghi_by_tilt_and_month)
 
     def _load_and_prepare_data(self):
         """
@@ -43,14 +72,26 @@ class SolarAnalysis:
             pd.DataFrame: A prepared DataFrame or None if loading fails.
         """
         try:
-            df = pd.read_csv(self.csv_file_path)
-            # Ensure essential columns are numeric
-            numeric_cols = ['DHI', 'DNI', 'Clearsky DHI', 'Clearsky DNI', 'Declination Angle', 'Month']
-            for col in numeric_cols:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            df.dropna(subset=numeric_cols, inplace=True)
+            # Only read the essential columns, parsed straight into compact dtypes.
+            # Single precision is ample for irradiance and halves the memory traffic.
+            column_dtypes = {
+                'DHI': np.float32,
+                'DNI': np.float32,
+                'Clearsky DHI': np.float32,
+                'Clearsky DNI': np.float32,
+                'Declination Angle': np.float32,
+                # Ordered categories 1-12; the integer codes index monthly results
+                'Month': pd.CategoricalDtype(categories=range(1, 13), ordered=True),
+            }
+            df = pd.read_csv(
+                self.csv_file_path,
+                usecols=list(column_dtypes),
+                dtype=column_dtypes,
+                na_values=['', 'NA', 'NaN'],
+            )
+            df.dropna(inplace=True)
             # Pre-calculate declination in radians
-            df['Declination Angle Rad'] = np.radians(df['Declination Angle'])
+            df['Declination Angle Rad'] = np.radians(df['Declination Angle']).astype(np.float32)
             return df
         except FileNotFoundError:
             print(f"Error: The file '{self.csv_file_path}' was not found.")
@@ -59,6 +100,108 @@ class SolarAnalysis:
             print(f"An error occurred while loading the data: {e}")
             return None
 
+    def _build_year_cache(self) -> dict:
+        """
+        Extracts whole-year numpy arrays for each sky condition, with night
+        hours and other zero-radiation hours already removed.
+
+        The angle of incidence is cos(LAT - tilt - decl) = A*cos(tilt) + B*sin(tilt),
+        with A = cos(LAT - decl) and B = sin(LAT - decl). A and B are computed
+        here once, so evaluating a tilt needs no per-hour trigonometry.
+
+        Returns:
+            dict: Maps sky_condition to (month_code, cos_lat_decl, sin_lat_decl, dhi, dni),
+            where month_code is 0 for January through 11 for December.
+        """
+        cache = {}
+        month_code = self.data['Month'].cat.codes.values
+        lat_minus_decl = self.LATITUDE_RADIANS_F32 - self.data['Declination Angle Rad'].values
+        cos_lat_decl = np.cos(lat_minus_decl)
+        sin_lat_decl = np.sin(lat_minus_decl)
+        for sky_condition in ('cloudy', 'clear'):
+            dhi_col = 'DHI' if sky_condition == 'cloudy' else 'Clearsky DHI'
+            dni_col = 'DNI' if sky_condition == 'cloudy' else 'Clearsky DNI'
+            dhi = self.data[dhi_col].values
+            dni = self.data[dni_col].values
+            daylight = ~((dhi == 0) & (dni == 0))
+            cache[sky_condition] = (month_code[daylight], cos_lat_decl[daylight], sin_lat_decl[daylight],
+                                    dhi[daylight], dni[daylight])
+        return cache
+
+    def _build_month_indices(self) -> dict:
+        """
+        Finds the positions of each month's hours within the whole-year arrays.
+
+        Returns:
+            dict: Maps (month, sky_condition) to an array of integer indices.
+        """
+        indices = {}
+        for sky_condition, (month_code, *_) in self._by_sky.items():
+            for month_num in range(1, 13):
+                indices[(month_num, sky_condition)] = np.flatnonzero(month_code == month_num - 1)
+        return indices
+
+    def _build_fixed_tilt_cache(self) -> dict:
+        """
+        Precomputes the monthly GHI of the tilts that Arrangements 1 and 2 hold
+        all year (0 degrees and the latitude), so any period at those tilts
+        reduces to a sum of monthly totals.
+
+        Returns:
+            dict: Maps (tilt_degrees, sky_condition) to the 12 monthly GHI sums.
+        """
+        return {
+            (tilt, sky_condition): self._calculate_monthly_ghi(tilt, sky_condition)
+            for sky_condition in self._by_sky
+            for tilt in (0, self.LATITUDE_DEGREES)
+        }
+
+    @staticmethod
+    def _sky_key(sky_condition: str) -> str:
+        """Maps a sky condition to its cache key: 'cloudy', or 'clear' for anything else."""
+        return 'cloudy' if sky_condition == 'cloudy' else 'clear'
+
+    def _get_period_arrays(self, months: list, sky_condition: str) -> tuple:
+        """
+        Gathers the cached arrays for a set of months.
+
+        When the months cover one contiguous run of hours (a single month, or
+        consecutive months of a time-ordered file) the arrays are returned as
+        views into the whole-year arrays without copying. Other periods are
+        gathered once and reused, so callers must not modify the arrays.
+
+        Args:
+            months (list): A list of month numbers to include.
+            sky_condition (str): 'cloudy' or 'clear'.
+
+        Returns:
+            tuple: (cos_lat_decl, sin_lat_decl, dhi, dni) as numpy arrays.
+        """
+        # A period is a set of months: order does not matter and a repeated month
+        # counts once, so [1, 2], [2, 1] and [1, 2, 2] share an entry
+        return self._cached_period_arrays(tuple(sorted(set(months))), self._sky_key(sky_condition))
+
+    def _gather_period_arrays(self, months: tuple, sky_condition: str) -> tuple:
+        """Uncached implementation of _get_period_arrays."""
+        if sky_condition not in self._by_sky:
+            return tuple(np.empty(0, dtype=np.float32) for _ in range(4))
+
+        _, *arrays = self._by_sky[sky_condition]
+        no_hours = np.empty(0, dtype=np.intp)
+        if len(months) == 1:
+            indices = self._month_indices.get((months[0], sky_condition), no_hours)
+        else:
+            # np.unique keeps the positions distinct, so the run check below is exact
+            indices = np.unique(np.concatenate([no_hours] + [self._month_indices.get((m, sky_condition), no_hours) for m in months]))
+
+        if indices.size == 0:
+            return tuple(array[:0] for array in arrays)
+        # Distinct positions spanning exactly their count form one unbroken run
+        start, stop = indices[0], indices[-1] + 1
+        if stop - start == indices.size:
+            return tuple(array[start:stop] for array in arrays)
+        return tuple(array[indices] for array in arrays)
+
     def calculate_ghi_for_tilt(self, tilt_degrees: float, months: list, sky_condition: str) -> float:
         """
         Calculates the total GHI for a given set of months and a fixed tilt angle.
@@ -71,57 +214,153 @@ class SolarAnalysis:
         Returns:
             float: The sum of GHI for the period.
         """
+        return self._cached_ghi_for_tilt(tilt_degrees, tuple(months), sky_condition)
+
+    def _calculate_ghi_for_tilt(self, tilt_degrees: float, months: tuple, sky_condition: str) -> float:
+        """Uncached implementation of calculate_ghi_for_tilt."""
         if self.data is None:
             return 0.0
 
-        dhi_col = 'DHI' if sky_condition == 'cloudy' else 'Clearsky DHI'
-        dni_col = 'DNI' if sky_condition == 'cloudy' else 'Clearsky DNI'
+        fixed_tilt_ghi = self._fixed_tilt_monthly_ghi.get((tilt_degrees, self._sky_key(sky_condition)))
+        if fixed_tilt_ghi is not None:
+            # Like the kernel path: each month once, months outside 1-12 contribute nothing
+            month_codes = [m - 1 for m in set(months) if 1 <= m <= 12]
+            return fixed_tilt_ghi[month_codes].sum()
 
-        df_period = self.data[self.data['Month'].isin(months)].copy()
-        
-        # Filter out night hours or zero-radiation hours to speed up calculation
-        df_period = df_period[~((df_period[dhi_col] == 0) & (df_period[dni_col] == 0))]
+        return self.calculate_ghi_for_tilts([tilt_degrees], months, sky_condition)[0]
 
-        if df_period.empty:
-            return 0.0
+    def calculate_ghi_for_tilts(self, tilts_degrees, months: list, sky_condition: str) -> np.ndarray:
+        """
+        Calculates the total GHI for a given set of months at several tilt angles at once.
 
-        panel_tilt_rad = np.radians(tilt_degrees)
+        The period is gathered a single time and all tilts are evaluated by one
+        fused kernel pass over the hours (see solar_kernels). Only cos(tilt) and
+        sin(tilt) are needed here (looked up for whole-degree tilts); the
+        per-hour terms are precomputed.
 
-        # Vectorized calculation for efficiency
-        declination_rad = df_period['Declination Angle Rad'].values
-        dhi = df_period[dhi_col].values
-        dni = df_period[dni_col].values
+        Args:
+            tilts_degrees (array-like): The panel tilt angles in degrees.
+            months (list): A list of month numbers to include in the calculation.
+            sky_condition (str): 'cloudy' or 'clear'.
 
-        theta_angle_rad = self.LATITUDE_RADIANS - panel_tilt_rad - declination_rad
-        cos_theta = np.cos(theta_angle_rad)
+        Returns:
+            np.ndarray: The sum of GHI for the period, one entry per tilt.
+        """
+        cos_tilts, sin_tilts = _tilt_trig(tilts_degrees)
+        ghi_per_tilt = np.zeros(cos_tilts.shape)
+        if self.data is None:
+            return ghi_per_tilt
 
-        # Only consider positive contributions from DNI (when the sun is in front of the panel)
-        dni_contribution = np.where(cos_theta > 0, cos_theta * dni, 0)
-        
-        ghi_output = dhi + dni_contribution
-        return np.sum(ghi_output)
+        cos_lat_decl, sin_lat_decl, dhi, dni = self._get_period_arrays(months, sky_condition)
+
+        # Only positive DNI contributions count (when the sun is in front of the panel)
+        ghi_sum_over_tilts(cos_tilts, sin_tilts, cos_lat_decl, sin_lat_decl, dhi, dni, ghi_per_tilt)
+        return ghi_per_tilt
 
-    def find_optimal_tilt(self, months: list, sky_condition: str) -> tuple:
+    def calculate_monthly_ghi(self, tilts_degrees, sky_condition: str) -> np.ndarray:
+        """
+        Calculates the GHI of every month in a single pass over the year.
+
+        Args:
+            tilts_degrees (float or array-like): One tilt used all year, or
+                twelve tilts in degrees, one per month from January to December.
+            sky_condition (str): 'cloudy' or 'clear'.
+
+        Returns:
+            np.ndarray: The sum of GHI for each of the 12 months.
+        """
+        if self.data is None:
+            return np.zeros(12)
+
+        if np.ndim(tilts_degrees) == 0 or len(set(tilts_degrees)) == 1:
+            fixed_tilt_ghi = self._fixed_tilt_monthly_ghi.get((np.ravel(tilts_degrees)[0], self._sky_key(sky_condition)))
+            if fixed_tilt_ghi is not None:
+                return fixed_tilt_ghi.copy()
+
+        return self._calculate_monthly_ghi(tilts_degrees, sky_condition)
+
+    def _calculate_monthly_ghi(self, tilts_degrees, sky_condition: str) -> np.ndarray:
+        """Computes the 12 monthly GHI sums without the fixed-tilt shortcut."""
+        month_code, cos_lat_decl, sin_lat_decl, dhi, dni = self._by_sky[self._sky_key(sky_condition)]
+        tilts_rad = np.radians(np.broadcast_to(np.asarray(tilts_degrees, dtype=np.float32), (12,)))
+
+        cos_theta = cos_lat_decl * np.cos(tilts_rad)[month_code] + sin_lat_decl * np.sin(tilts_rad)[month_code]
+        ghi_output = dhi + np.where(cos_theta > 0, cos_theta * dni, 0.0)
+
+        # One pass for all 12 monthly sums, accumulated in double precision
+        return np.bincount(month_code, weights=ghi_output, minlength=12)
+
+    def find_optimal_tilt(self, months: list, sky_condition: str, method: str = 'analytic') -> tuple:
         """
         Finds the single optimal tilt that maximizes GHI for a given period.
 
+        The DNI term expands to C*cos(tilt) + S*sin(tilt), where
+        C = sum(dni*cos(LAT - decl)) and S = sum(dni*sin(LAT - decl)), so it
+        peaks at atan2(S, C). For tilts in 0-90 degrees at this latitude the
+        sun never falls behind the panel, so this is the exact optimum and only
+        the two whole-number tilts around it need to be evaluated.
+
         Args:
             months (list): A list of month numbers for the optimization period.
             sky_condition (str): 'cloudy' or 'clear'.
+            method (str): 'analytic' (default) or 'grid' to evaluate every
+                whole-number tilt from 0 to 90 degrees.
 
         Returns:
             tuple: (best_tilt, max_ghi)
         """
-        max_ghi = -1
-        best_tilt = -1
-
-        for tilt in range(0, 91):  # Iterate from 0 to 90 degrees
-            ghi = self.calculate_ghi_for_tilt(tilt, months, sky_condition)
-            if ghi > max_ghi:
-                max_ghi = ghi
-                best_tilt = tilt
-        
-        return best_tilt, max_ghi
+        return self._cached_optimal_tilt(tuple(months), sky_condition, method)
+
+    def _find_optimal_tilt(self, months: tuple, sky_condition: str, method: str) -> tuple:
+        """Uncached implementation of find_optimal_tilt."""
+        if method == 'grid':
+            candidate_tilts = np.arange(91)
+        elif method == 'analytic':
+            cos_lat_decl, sin_lat_decl, _, dni = self._get_period_arrays(months, sky_condition)
+            s = np.sum(dni * sin_lat_decl, dtype=np.float64)
+            c = np.sum(dni * cos_lat_decl, dtype=np.float64)
+            tilt_star = np.clip(np.degrees(np.arctan2(s, c)), 0, 90)
+            candidate_tilts = np.unique([np.floor(tilt_star), np.ceil(tilt_star)]).astype(int)
+        else:
+            raise ValueError(f"Unknown method '{method}'. Expected 'analytic' or 'grid'.")
+
+        ghi_per_tilt = self.calculate_ghi_for_tilts(candidate_tilts, months, sky_condition)
+        best_index = int(ghi_per_tilt.argmax())
+
+        return int(candidate_tilts[best_index]), ghi_per_tilt[best_index]
+
+    def _calculate_ghi_by_tilt_and_month(self, sky_condition: str) -> np.ndarray:
+        """
+        Tabulates the GHI of every month at every whole-number tilt.
+
+        Returns:
+            np.ndarray: Shape (91, 12); entry [t, m] is the GHI of month m + 1 at t degrees.
+        """
+        table = np.zeros((91, 12))
+        for month_num in range(1, 13):
+            table[:, month_num - 1] = self.calculate_ghi_for_tilts(np.arange(91), [month_num], sky_condition)
+        return table
+
+    def find_optimal_tilt_bulk(self, month_masks: np.ndarray, sky_condition: str) -> tuple:
+        """
+        Finds the optimal tilt for many periods at once.
+
+        Each period's GHI at every whole-number tilt is the sum of its months'
+        columns in a cached (tilt x month) table, so all periods are scored by a
+        single matrix product and searched over the full 0-90 degree grid.
+
+        Args:
+            month_masks (np.ndarray): Boolean array of shape (n_periods, 12);
+                row i marks the months (January first) in period i.
+            sky_condition (str): 'cloudy' or 'clear'.
+
+        Returns:
+            tuple: (best_tilts, max_ghi) as arrays of length n_periods.
+        """
+        ghi_by_tilt_and_month = self._cached_ghi_by_tilt_and_month(self._sky_key(sky_condition))
+        ghi_per_period_and_tilt = np.asarray(month_masks, dtype=np.float64) @ ghi_by_tilt_and_month.T
+        best_tilts = ghi_per_period_and_tilt.argmax(axis=1)
+        return best_tilts, ghi_per_period_and_tilt[np.arange(len(best_tilts)), best_tilts]
 
     # --- Arrangement Analyses ---
 
@@ -176,38 +415,37 @@ class SolarAnalysis:
         Returns:
             pd.DataFrame: A DataFrame containing the results.
         """
-        results = []
-        month_names = {1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun", 
-                       7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"}
+        month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
-        for i in range(1, 13):
-            months_in_window = [(m - 1) % 12 + 1 for m in range(i, i + window_size)]
-            
-            # Create a name for the window (e.g., "Jan-Mar")
-            start_month_name = month_names[months_in_window[0]]
-            end_month_name = month_names[months_in_window[-1]]
-            window_name = f"{start_month_name}-{end_month_name}"
+        # Row i holds the month indices (0 = Jan) of the window starting at month i, wrapping the year
+        windows = (np.arange(12)[:, None] + np.arange(window_size)[None, :]) % 12
+        window_masks = np.zeros((12, 12), dtype=bool)
+        np.put_along_axis(window_masks, windows, True, axis=1)
 
-            best_tilt, _ = self.find_optimal_tilt(months_in_window, sky_condition)
-            results.append({"Window": window_name, f"Optimal Tilt ({sky_condition.capitalize()})": best_tilt})
+        best_tilts, _ = self.find_optimal_tilt_bulk(window_masks, sky_condition)
 
-        return pd.DataFrame(results)
+        # Name each window (e.g., "Jan-Mar")
+        window_names = [f"{month_names[start]}-{month_names[end]}" for start, end in zip(windows[:, 0], windows[:, -1])]
+        return pd.DataFrame({"Window": window_names, f"Optimal Tilt ({sky_condition.capitalize()})": best_tilts})
 
 # --- Plotting and Reporting Functions ---
 
 def plot_arrangement_comparison(results_df: pd.DataFrame, year: int):
     """Plots a bar chart comparing the GHI of all arrangements."""
-    results_df.plot(
-        kind='bar',
-        figsize=(14, 8),
-        width=0.8
-    )
-    plt.title(f'Annual GHI Output Comparison for All Arrangements ({year})', fontsize=16)
-    plt.ylabel('Total GHI (Wh/m²)', fontsize=12)
-    plt.xlabel('Tilt Arrangement', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.tight_layout()
+    fig, ax = plt.subplots(figsize=(14, 8))
+    x = np.arange(len(results_df))
+    bar_width = 0.8 / len(results_df.columns)
+    for i, column in enumerate(results_df.columns):
+        offset = (i - (len(results_df.columns) - 1) / 2) * bar_width
+        ax.bar(x + offset, results_df[column].values, width=bar_width, label=column)
+
+    ax.set_title(f'Annual GHI Output Comparison for All Arrangements ({year})', fontsize=16)
+    ax.set_ylabel('Total GHI (Wh/m²)', fontsize=12)
+    ax.set_xlabel('Tilt Arrangement', fontsize=12)
+    ax.set_xticks(x, results_df.index, rotation=45, ha='right')
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.legend()
+    fig.tight_layout()
     plt.show()
 
 def plot_sliding_window_analysis(df_2022: pd.DataFrame, df_2023: pd.DataFrame):
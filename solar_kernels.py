@@ -0,0 +1,70 @@
+"""
+solar_kernels.py
+
+Compiled numerical kernels for the solar panel tilt analysis. The GHI sum
+over a batch of tilt angles is fused into a single pass over the hourly data
+with Numba; when Numba is not installed the same sum is computed as a single
+BLAS matrix product with numpy.
+
+The angle of incidence is expanded as
+cos(LAT - tilt - decl) = cos(LAT - decl)*cos(tilt) + sin(LAT - decl)*sin(tilt),
+so the kernels take the per-hour cos/sin terms precomputed and only combine
+them with the cos/sin of each tilt.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; fall back to a numpy GEMM
+    njit = None
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def ghi_sum_over_tilts(cos_tilts, sin_tilts, cos_lat_decl, sin_lat_decl, dhi, dni, out):
+        """
+        Sums the GHI over all hours for each tilt angle, writing into `out`.
+
+        Args:
+            cos_tilts (np.ndarray): cos() of the panel tilt angles.
+            sin_tilts (np.ndarray): sin() of the panel tilt angles.
+            cos_lat_decl (np.ndarray): Hourly cos(LAT - declination).
+            sin_lat_decl (np.ndarray): Hourly sin(LAT - declination).
+            dhi (np.ndarray): The hourly DHI values.
+            dni (np.ndarray): The hourly DNI values.
+            out (np.ndarray): Output array, one entry per tilt.
+        """
+        for t in prange(cos_tilts.shape[0]):
+            ct = cos_tilts[t]
+            st = sin_tilts[t]
+            s = 0.0
+            for i in range(dhi.shape[0]):
+                c = cos_lat_decl[i] * ct + sin_lat_decl[i] * st
+                s += dhi[i] + (c * dni[i] if c > 0.0 else 0.0)
+            out[t] = s
+else:
+    def ghi_sum_over_tilts(cos_tilts, sin_tilts, cos_lat_decl, sin_lat_decl, dhi, dni, out):
+        """
+        Sums the GHI over all hours for each tilt angle, writing into `out`.
+
+        Args:
+            cos_tilts (np.ndarray): cos() of the panel tilt angles.
+            sin_tilts (np.ndarray): sin() of the panel tilt angles.
+            cos_lat_decl (np.ndarray): Hourly cos(LAT - declination).
+            sin_lat_decl (np.ndarray): Hourly sin(LAT - declination).
+            dhi (np.ndarray): The hourly DHI values.
+            dni (np.ndarray): The hourly DNI values.
+            out (np.ndarray): Output array, one entry per tilt.
+        """
+        # (n_tilts, 2) @ (2, n_hours) gives cos(theta) * dni as a single BLAS GEMM;
+        # dni >= 0, so clamping the product is the same as clamping cos(theta)
+        tilt_terms = np.empty((cos_tilts.shape[0], 2), dtype=dni.dtype)
+        tilt_terms[:, 0] = cos_tilts
+        tilt_terms[:, 1] = sin_tilts
+        hour_terms = np.empty((2, dni.shape[0]), dtype=dni.dtype)
+        np.multiply(cos_lat_decl, dni, out=hour_terms[0])
+        np.multiply(sin_lat_decl, dni, out=hour_terms[1])
+
+        dni_contribution = tilt_terms @ hour_terms
+        np.maximum(dni_contribution, 0, out=dni_contribution)
+        out[:] = dni_contribution.sum(axis=1, dtype=np.float64) + dhi.sum(dtype=np.float64)